@@ -10,14 +10,17 @@ setup(
         "gitpython>=3.1.40",
         "langchain>=0.1.4",
         "langchain-community>=0.0.13",
-        "langchain-openai>=0.0.5",
+        "langchain-openai>=0.1.21",
         "python-dotenv>=1.0.0",
         "PyGithub>=2.1.1",
-        "markdown>=3.5",
+        "markdown-it-py>=3.0.0",
         "jinja2>=3.1.2",
         "requests>=2.31.0",
         "tqdm>=4.66.1",
         "openai>=1.10.0",
+        "httpx>=0.25.0",
+        "tenacity>=8.2.0",
+        "tomli>=2.0.1; python_version < '3.11'",
     ],
     extras_require={
         "dev": ["pytest>=7.4.3"],
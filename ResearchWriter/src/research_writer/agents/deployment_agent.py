@@ -1,18 +1,26 @@
 from typing import Dict, List
 from crewai import Agent, Task
+import asyncio
 import os
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from research_writer.batch import chat_request
+from research_writer.cache import disk_memoize
+from research_writer.llm import ConcurrencyLimit, SharedAsyncOpenAI, aexecute_task, chat_model, llm_identity, summarize_analysis, system_message
 
 class DeploymentAgent:
     """Agent responsible for generating deployment configurations based on repository analysis."""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, max_concurrency: int = 4,
+                 openai_client: SharedAsyncOpenAI = None,
+                 concurrency_limit: ConcurrencyLimit = None):
         """
         Initialize the deployment agent.
         
         Args:
             api_key: OpenAI API key
+            max_concurrency: Maximum number of LLM requests in flight at once
+            openai_client: Optional OpenAI client shared between agents
+            concurrency_limit: Optional limit shared between agents; overrides max_concurrency
         """
         if api_key is None:
             load_dotenv()
@@ -20,10 +28,8 @@ class DeploymentAgent:
             if api_key is None:
                 raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
         
-        self.llm = ChatOpenAI(
-            temperature=0.3,  # Lower temperature for more deterministic responses
-            model_name="gpt-3.5-turbo"
-        )
+        # Lower temperature for more deterministic responses
+        self.llm = chat_model(temperature=0.3, openai_client=openai_client)
         
         self.agent = Agent(
             role='Deployment Engineer',
@@ -35,28 +41,113 @@ class DeploymentAgent:
             llm=self.llm,
             verbose=True
         )
+        
+        self._system_msg = system_message(self.agent)
+        self._limit = concurrency_limit or ConcurrencyLimit(max_concurrency)
+        self._cache_identity = llm_identity(self.llm, self._system_msg)
+        self._cacheable = True
 
     def generate_deployment_config(self, repo_analysis: Dict) -> Dict:
         """
         Generate deployment configurations based on repository analysis.
         
+        Synchronous wrapper around agenerate_deployment_config.
+        
+        Args:
+            repo_analysis: Dictionary containing repository analysis results
+            
+        Returns:
+            Dictionary containing deployment configurations
+        """
+        return asyncio.run(self.agenerate_deployment_config(repo_analysis))
+
+    async def agenerate_deployment_config(self, repo_analysis: Dict) -> Dict:
+        """
+        Generate deployment configurations based on repository analysis.
+        
+        The configurations are independent of each other, so they are
+        requested concurrently.
+        
         Args:
             repo_analysis: Dictionary containing repository analysis results
             
         Returns:
             Dictionary containing deployment configurations
         """
+        # Render the analysis for the prompts once rather than in every task
+        digest = summarize_analysis(repo_analysis)
+        if self._needs_kubernetes(repo_analysis):
+            k8s = self._agen_kubernetes_config(digest)
+        else:
+            k8s = self._skip()
+        
+        docker, k8s, ci_cd, env_vars = await asyncio.gather(
+            self._agen_dockerfile(digest),
+            k8s,
+            self._agen_ci_cd_config(digest),
+            self._agen_env_variables(digest),
+        )
         configs = {
-            "docker": self._generate_dockerfile(repo_analysis),
-            "k8s": self._generate_kubernetes_config(repo_analysis) if self._needs_kubernetes(repo_analysis) else None,
-            "ci_cd": self._generate_ci_cd_config(repo_analysis),
-            "env_vars": self._identify_env_variables(repo_analysis)
+            "docker": docker,
+            "k8s": k8s,
+            "ci_cd": ci_cd,
+            "env_vars": env_vars
         }
         return configs
 
-    def _generate_dockerfile(self, analysis: Dict) -> str:
+    def batch_requests(self, repo_analysis: Dict) -> Dict[str, Dict]:
+        """
+        Build the LLM requests for the deployment configurations, for submission
+        through the Batch API.
+        
+        Args:
+            repo_analysis: Dictionary containing repository analysis results
+            
+        Returns:
+            Dictionary mapping configuration names to chat completion request bodies
+        """
+        digest = summarize_analysis(repo_analysis)
+        tasks = {"docker": self._dockerfile_task(digest)}
+        if self._needs_kubernetes(repo_analysis):
+            tasks["k8s"] = self._kubernetes_config_task(digest)
+        tasks["ci_cd"] = self._ci_cd_config_task(digest)
+        tasks["env_vars"] = self._env_variables_task(digest)
+        return {name: chat_request(self.llm, self._system_msg.content, task) for name, task in tasks.items()}
+
+    def deployment_config_from_batch(self, results: Dict[str, str]) -> Dict:
+        """
+        Assemble deployment configurations from LLM results obtained through the Batch API.
+        
+        Args:
+            results: Responses to the requests built by batch_requests
+            
+        Returns:
+            Dictionary containing deployment configurations
+        """
+        return {
+            "docker": results["docker"],
+            "k8s": results.get("k8s"),
+            "ci_cd": results["ci_cd"],
+            "env_vars": results["env_vars"]
+        }
+
+    @staticmethod
+    async def _skip() -> None:
+        """Placeholder coroutine for configurations that are not needed."""
+        return None
+
+    async def _aexecute_task(self, task: Task) -> str:
+        """Run a task against the LLM without blocking the event loop."""
+        return await aexecute_task(self.llm, self._system_msg, self._limit, task)
+
+    @disk_memoize()
+    async def _agen_dockerfile(self, analysis: Dict) -> str:
         """Generate a Dockerfile based on the repository analysis."""
-        task = Task(
+        return await self._aexecute_task(self._dockerfile_task(analysis))
+
+    def _dockerfile_task(self, analysis: Dict) -> Task:
+        """Build the task generating the Dockerfile."""
+        return Task(
             description=f"""Create a Dockerfile for the repository with these characteristics:
             Languages: {analysis.get('code_analysis', {}).get('languages', {})}
             Dependencies: {analysis.get('dependencies', {})}
@@ -69,11 +160,15 @@ class DeploymentAgent:
             5. Optimized layer caching""",
             expected_output="A complete Dockerfile content with comments explaining each step"
         )
-        return self.agent.execute_task(task)
 
-    def _generate_kubernetes_config(self, analysis: Dict) -> str:
+    @disk_memoize()
+    async def _agen_kubernetes_config(self, analysis: Dict) -> str:
         """Generate Kubernetes configuration files if needed."""
-        task = Task(
+        return await self._aexecute_task(self._kubernetes_config_task(analysis))
+
+    def _kubernetes_config_task(self, analysis: Dict) -> Task:
+        """Build the task generating the Kubernetes configuration."""
+        return Task(
             description=f"""Create Kubernetes deployment and service configurations for:
             Application: {analysis.get('basic_info', {}).get('name')}
             Architecture: {analysis.get('code_analysis', {}).get('architecture')}
@@ -86,7 +181,6 @@ class DeploymentAgent:
             5. Health checks""",
             expected_output="Complete Kubernetes YAML configurations"
         )
-        return self.agent.execute_task(task)
 
     def _needs_kubernetes(self, analysis: Dict) -> bool:
         """Determine if the application needs Kubernetes deployment."""
@@ -97,9 +191,14 @@ class DeploymentAgent:
         
         return has_k8s_files or has_microservices
 
-    def _generate_ci_cd_config(self, analysis: Dict) -> str:
+    @disk_memoize()
+    async def _agen_ci_cd_config(self, analysis: Dict) -> str:
         """Generate CI/CD pipeline configuration."""
-        task = Task(
+        return await self._aexecute_task(self._ci_cd_config_task(analysis))
+
+    def _ci_cd_config_task(self, analysis: Dict) -> Task:
+        """Build the task generating the CI/CD pipeline configuration."""
+        return Task(
             description=f"""Create a CI/CD pipeline configuration for:
             Repository: {analysis.get('basic_info', {}).get('name')}
             Branches: {analysis.get('basic_info', {}).get('branches', [])}
@@ -112,11 +211,15 @@ class DeploymentAgent:
             5. Environment-specific configurations""",
             expected_output="A complete CI/CD pipeline configuration file"
         )
-        return self.agent.execute_task(task)
 
-    def _identify_env_variables(self, analysis: Dict) -> List[str]:
+    @disk_memoize()
+    async def _agen_env_variables(self, analysis: Dict) -> List[str]:
         """Identify required environment variables from the codebase."""
-        task = Task(
+        return await self._aexecute_task(self._env_variables_task(analysis))
+
+    def _env_variables_task(self, analysis: Dict) -> Task:
+        """Build the task generating the environment variable listing."""
+        return Task(
             description=f"""Analyze the codebase and identify required environment variables:
             Dependencies: {analysis.get('dependencies', {})}
             File Structure: {analysis.get('structure', {})}
@@ -127,5 +230,4 @@ class DeploymentAgent:
             3. Database connections
             4. External service configurations""",
             expected_output="A list of required environment variables with descriptions"
-        )
-        return self.agent.execute_task(task)
\ No newline at end of file
+        )
\ No newline at end of file
@@ -1,19 +1,102 @@
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from crewai import Agent, Task
 from git import Repo
+import ast
+import asyncio
+import json
 import os
+import re
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from research_writer.batch import chat_request
+from research_writer.cache import disk_memoize
+from research_writer.llm import ConcurrencyLimit, SharedAsyncOpenAI, aexecute_task, chat_model, llm_identity, system_message
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+NOT_PARSED = "Found but not parsed"
+# As in pip, "#" only starts a comment at the start of a line or after
+# whitespace, so URL fragments such as #egg= and #sha256= are kept
+REQUIREMENT_COMMENT = re.compile(r"(^|\s)#.*$")
+SHORTLOG_LINE = re.compile(r"^\s*(?P<commits>\d+)\t(?P<name>.*?) <(?P<email>[^>]*)>$")
+
+
+def _scan_dir(path: str) -> Tuple[str, Optional[List[str]], List[str]]:
+    """List a directory, returning its files and the subdirectories to descend into."""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != ".git":
+                        subdirs.append(entry.path)
+                elif not entry.is_dir():
+                    files.append(entry.name)
+    except OSError:
+        # Unreadable directories are skipped, as os.walk does
+        return path, None, []
+    return path, files, subdirs
+
+
+def _repo_revision(repo_path: str, ignore_paths: Iterable[str] = ()) -> Optional[str]:
+    """
+    Return the HEAD sha of a clean repository, or None when results must not be cached.
+    
+    Changes to ignore_paths, such as the documentation being written into the
+    repository, do not count as local changes.
+    """
+    repo = Repo(repo_path)
+    pathspecs = []
+    for path in ignore_paths:
+        rel_path = os.path.relpath(os.path.abspath(path), repo.working_tree_dir)
+        if not rel_path.startswith(os.pardir):
+            pathspecs.append(f":(top,literal,exclude){rel_path}")
+    if repo.git.status("--porcelain", "--untracked-files=all", "--", ":(top)", *pathspecs):
+        return None
+    return repo.head.commit.hexsha
+
+
+def _revision_key(repo_path: str, revision: Optional[str]) -> Optional[str]:
+    """Cache key for results computed at a revision; None bypasses the cache."""
+    return revision
+
+
+def _poetry_requirement(name: str, spec: Union[str, Dict, List]) -> str:
+    """Format a Poetry dependency, whose spec is a version, a table or a list of tables."""
+    if isinstance(spec, dict):
+        spec = spec.get("version", "")
+    elif isinstance(spec, list):
+        # Multiple constraints, each applying under different markers
+        versions = (
+            constraint.get("version", "") if isinstance(constraint, dict) else str(constraint)
+            for constraint in spec
+        )
+        spec = " || ".join(version for version in versions if version)
+    return f"{name} {spec}".strip() if spec != "*" else name
+
 
 class ResearchAgent:
     """Agent responsible for analyzing GitHub repositories."""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, max_concurrency: int = 2,
+                 openai_client: SharedAsyncOpenAI = None,
+                 concurrency_limit: ConcurrencyLimit = None):
         """
         Initialize the research agent.
         
         Args:
             api_key: OpenAI API key
+            max_concurrency: Maximum number of LLM requests in flight at once
+            openai_client: Optional OpenAI client shared between agents
+            concurrency_limit: Optional limit shared between agents; overrides max_concurrency
         """
         if api_key is None:
             load_dotenv()
@@ -21,10 +104,7 @@ class ResearchAgent:
             if api_key is None:
                 raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
         
-        self.llm = ChatOpenAI(
-            temperature=0.1,
-            model_name="gpt-3.5-turbo"
-        )
+        self.llm = chat_model(temperature=0.1, openai_client=openai_client)
         
         self.agent = Agent(
             role='Research Analyst',
@@ -37,104 +117,202 @@ class ResearchAgent:
             verbose=True
         )
         
-    def analyze_repository(self, repo_path: str) -> Dict:
+        self._system_msg = system_message(self.agent)
+        self._limit = concurrency_limit or ConcurrencyLimit(max_concurrency)
+        self._cache_identity = llm_identity(self.llm, self._system_msg)
+        self._cacheable = True
+        
+    def analyze_repository(self, repo_path: str, ignore_paths: Iterable[str] = ()) -> Dict:
+        """
+        Analyze a GitHub repository and extract relevant information.
+        
+        Synchronous wrapper around aanalyze_repository.
+        
+        Args:
+            repo_path: Path to the local git repository
+            ignore_paths: Files whose local changes do not prevent caching
+            
+        Returns:
+            Dictionary containing analysis results
+        """
+        return asyncio.run(self.aanalyze_repository(repo_path, ignore_paths))
+    
+    async def aanalyze_repository(self, repo_path: str, ignore_paths: Iterable[str] = ()) -> Dict:
         """
         Analyze a GitHub repository and extract relevant information.
         
+        The architecture and design pattern prompts are requested concurrently,
+        and their results are cached per commit unless the repository has local
+        changes. The rest of the analysis is read from the repository on every
+        call, as branches and git-ignored files can change at the same commit.
+        
         Args:
             repo_path: Path to the local git repository
+            ignore_paths: Files whose local changes do not prevent caching,
+                e.g. the documentation output path
             
         Returns:
             Dictionary containing analysis results
         """
+        # Checking for local changes runs git status; do it once per analysis,
+        # in a worker thread so the event loop is not blocked
+        revision = await asyncio.get_running_loop().run_in_executor(
+            None, _repo_revision, repo_path, tuple(ignore_paths)
+        )
+        architecture, patterns = await asyncio.gather(
+            self._aidentify_architecture(repo_path, revision),
+            self._aidentify_patterns(repo_path, revision),
+        )
+        return self._build_analysis(repo_path, architecture, patterns)
+    
+    def batch_requests(self, repo_path: str) -> Dict[str, Dict]:
+        """
+        Build the LLM requests of the analysis for submission through the Batch API.
+        
+        Args:
+            repo_path: Path to the local git repository
+            
+        Returns:
+            Dictionary mapping request names to chat completion request bodies
+        """
+        return {
+            "architecture": chat_request(self.llm, self._system_msg.content, self._architecture_task(repo_path)),
+            "patterns": chat_request(self.llm, self._system_msg.content, self._patterns_task(repo_path)),
+        }
+    
+    def analysis_from_batch(self, repo_path: str, results: Dict[str, str]) -> Dict:
+        """
+        Analyze a repository using LLM results obtained through the Batch API.
+        
+        Args:
+            repo_path: Path to the local git repository
+            results: Responses to the requests built by batch_requests
+            
+        Returns:
+            Dictionary containing analysis results
+        """
+        return self._build_analysis(repo_path, results["architecture"], results["patterns"].split("\n"))
+    
+    def _build_analysis(self, repo_path: str, architecture: str, patterns: List[str]) -> Dict:
+        """Collect the repository analysis around the LLM-identified architecture and patterns."""
         repo = Repo(repo_path)
         
+        # Every commit on HEAD is attributed to exactly one author, so the
+        # contributor counts also give the total without a second history walk
+        contributors = self._analyze_contributors(repo)
+        total_commits = sum(contributor["commits"] for contributor in contributors)
+        
+        # A single walk of the working tree yields both the structure and
+        # the file extension counts
+        structure, languages = self._walk_repo(repo_path)
+        
         # Collect basic repository information
         analysis = {
-            "basic_info": self._get_basic_info(repo),
-            "structure": self._analyze_structure(repo_path),
-            "code_analysis": self._analyze_code(repo_path),
-            "contributors": self._analyze_contributors(repo),
+            "basic_info": self._get_basic_info(repo, total_commits),
+            "structure": structure,
+            "code_analysis": self._analyze_code(languages, architecture, patterns),
+            "contributors": contributors,
             "dependencies": self._analyze_dependencies(repo_path)
         }
         
         return analysis
     
-    def _get_basic_info(self, repo: Repo) -> Dict:
+    def _get_basic_info(self, repo: Repo, total_commits: int) -> Dict:
         """Extract basic repository information."""
         return {
             "name": os.path.basename(repo.working_dir),
             "description": repo.description,
             "default_branch": repo.active_branch.name,
-            "total_commits": sum(1 for _ in repo.iter_commits()),
+            "total_commits": total_commits,
             "branches": [branch.name for branch in repo.branches]
         }
     
-    def _analyze_structure(self, repo_path: str) -> Dict:
-        """Analyze the repository structure."""
+    def _walk_repo(self, repo_path: str, max_workers: int = 8) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+        """
+        Walk the repository once, collecting its structure and file extension counts.
+        
+        Directories are scanned in parallel with os.scandir, which reads entry
+        types from the directory listing instead of stat()ing every file.
+        """
+        scanned = {}
+        extensions = Counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {executor.submit(_scan_dir, repo_path)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, files, subdirs = future.result()
+                    if files is None:
+                        continue
+                    scanned[path] = files
+                    for file in files:
+                        # Cheaper than os.path.splitext; as there, a leading dot
+                        # (e.g. .gitignore) does not start an extension
+                        i = file.rfind(".")
+                        if i > 0:
+                            extensions[file[i:].lower()] += 1
+                    for subdir in subdirs:
+                        pending.add(executor.submit(_scan_dir, subdir))
+        
+        # Directories finish in arbitrary order; list them root first, then by path
         structure = {}
-        for root, dirs, files in os.walk(repo_path):
-            if ".git" in dirs:
-                dirs.remove(".git")
-            rel_path = os.path.relpath(root, repo_path)
-            if rel_path == ".":
-                structure["/"] = files
-            else:
-                structure[rel_path] = files
-        return structure
-    
-    def _analyze_code(self, repo_path: str) -> Dict:
+        for path in sorted(scanned, key=lambda p: (p != repo_path, p)):
+            rel_path = os.path.relpath(path, repo_path)
+            structure["/" if rel_path == "." else rel_path] = scanned[path]
+        return structure, dict(extensions)
+    
+    def _analyze_code(self, languages: Dict[str, int], architecture: str, patterns: List[str]) -> Dict:
         """Analyze code patterns and architecture."""
         code_analysis = {
-            "languages": self._detect_languages(repo_path),
-            "architecture": self._identify_architecture(repo_path),
-            "patterns": self._identify_patterns(repo_path)
+            "languages": languages,
+            "architecture": architecture,
+            "patterns": patterns
         }
         return code_analysis
     
-    def _detect_languages(self, repo_path: str) -> Dict[str, int]:
-        """Detect programming languages used in the repository."""
-        extensions = {}
-        for root, _, files in os.walk(repo_path):
-            for file in files:
-                ext = os.path.splitext(file)[1].lower()
-                if ext:
-                    extensions[ext] = extensions.get(ext, 0) + 1
-        return extensions
-    
-    def _identify_architecture(self, repo_path: str) -> str:
+    async def _aexecute_task(self, task: Task) -> str:
+        """Run a task against the LLM without blocking the event loop."""
+        return await aexecute_task(self.llm, self._system_msg, self._limit, task)
+    
+    @disk_memoize(key=_revision_key)
+    async def _aidentify_architecture(self, repo_path: str, revision: Optional[str]) -> str:
         """Identify the software architecture pattern."""
+        return await self._aexecute_task(self._architecture_task(repo_path))
+    
+    def _architecture_task(self, repo_path: str) -> Task:
+        """Build the task identifying the architecture pattern."""
         # This would use the LLM to analyze the codebase and identify architecture patterns
-        task = Task(
+        return Task(
             description=f"Analyze the codebase at {repo_path} and identify the main architectural pattern used.",
             expected_output="A detailed description of the architectural pattern used in the codebase"
         )
-        return self.agent.execute_task(task)
     
-    def _identify_patterns(self, repo_path: str) -> List[str]:
+    @disk_memoize(key=_revision_key)
+    async def _aidentify_patterns(self, repo_path: str, revision: Optional[str]) -> List[str]:
         """Identify common design patterns used in the code."""
+        patterns_text = await self._aexecute_task(self._patterns_task(repo_path))
+        return patterns_text.split("\n")
+    
+    def _patterns_task(self, repo_path: str) -> Task:
+        """Build the task listing the design patterns."""
         # This would use the LLM to analyze the codebase and identify design patterns
-        task = Task(
+        return Task(
             description=f"Analyze the codebase at {repo_path} and list the main design patterns used.",
             expected_output="A list of design patterns found in the codebase"
         )
-        patterns_text = self.agent.execute_task(task)
-        return patterns_text.split("\n")
     
     def _analyze_contributors(self, repo: Repo) -> List[Dict]:
         """Analyze repository contributors."""
+        # git shortlog aggregates commits per author natively, most active first
         contributors = []
-        for commit in repo.iter_commits():
-            contributor = {
-                "name": commit.author.name,
-                "email": commit.author.email,
-                "commits": 1
-            }
-            if contributor not in contributors:
-                contributors.append(contributor)
-            else:
-                idx = contributors.index(contributor)
-                contributors[idx]["commits"] += 1
+        for line in repo.git.shortlog("-sne", "HEAD").splitlines():
+            match = SHORTLOG_LINE.match(line)
+            if match:
+                contributors.append({
+                    "name": match.group("name"),
+                    "email": match.group("email"),
+                    "commits": int(match.group("commits"))
+                })
         return contributors
     
     def _analyze_dependencies(self, repo_path: str) -> Dict:
@@ -148,26 +326,121 @@ class ResearchAgent:
     def _analyze_python_dependencies(self, repo_path: str) -> Dict:
         """Analyze Python dependencies."""
         dependencies = {}
-        req_file = os.path.join(repo_path, "requirements.txt")
-        setup_file = os.path.join(repo_path, "setup.py")
-        pyproject_file = os.path.join(repo_path, "pyproject.toml")
-        
-        if os.path.exists(req_file):
-            with open(req_file) as f:
-                dependencies["requirements.txt"] = f.read().splitlines()
-        if os.path.exists(setup_file):
-            dependencies["setup.py"] = "Found but not parsed"
-        if os.path.exists(pyproject_file):
-            dependencies["pyproject.toml"] = "Found but not parsed"
+        parsers = {
+            "requirements.txt": self._parse_requirements,
+            "setup.py": self._parse_setup_py,
+            "pyproject.toml": self._parse_pyproject,
+        }
+        
+        for filename, parse in parsers.items():
+            try:
+                dependencies[filename] = parse(os.path.join(repo_path, filename))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                dependencies[filename] = NOT_PARSED
             
         return dependencies
     
     def _analyze_js_dependencies(self, repo_path: str) -> Dict:
         """Analyze JavaScript dependencies."""
         dependencies = {}
-        package_json = os.path.join(repo_path, "package.json")
         
-        if os.path.exists(package_json):
-            dependencies["package.json"] = "Found but not parsed"
+        try:
+            dependencies["package.json"] = self._parse_package_json(os.path.join(repo_path, "package.json"))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            dependencies["package.json"] = NOT_PARSED
             
-        return dependencies
\ No newline at end of file
+        return dependencies
+    
+    def _parse_requirements(self, req_file: str) -> List[str]:
+        """Extract requirement specifiers, skipping blank lines and comments."""
+        requirements = []
+        with open(req_file) as f:
+            for line in f:
+                line = REQUIREMENT_COMMENT.sub("", line).strip()
+                if line:
+                    requirements.append(line)
+        return requirements
+    
+    def _parse_setup_py(self, setup_file: str) -> Union[List[str], str]:
+        """Statically extract install_requires from the setup() call in setup.py."""
+        with open(setup_file) as f:
+            try:
+                tree = ast.parse(f.read(), filename=setup_file)
+            except (SyntaxError, ValueError):
+                return NOT_PARSED
+        
+        # install_requires is often a module-level list passed by name
+        assignments = {}
+        for node in tree.body:
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        assignments[target.id] = node.value
+        
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            func_name = getattr(node.func, "id", None) or getattr(node.func, "attr", None)
+            if func_name != "setup":
+                continue
+            for keyword in node.keywords:
+                if keyword.arg != "install_requires":
+                    continue
+                value = keyword.value
+                if isinstance(value, ast.Name):
+                    value = assignments.get(value.id, value)
+                try:
+                    return [str(requirement) for requirement in ast.literal_eval(value)]
+                except (ValueError, TypeError, SyntaxError):
+                    return NOT_PARSED
+            return []
+        return NOT_PARSED
+    
+    def _parse_pyproject(self, pyproject_file: str) -> Union[List[str], str]:
+        """Extract PEP 621 or Poetry dependencies from pyproject.toml."""
+        with open(pyproject_file, "rb") as f:
+            if tomllib is None:
+                return NOT_PARSED
+            try:
+                pyproject = tomllib.load(f)
+            except ValueError:
+                return NOT_PARSED
+        
+        project = pyproject.get("project", {})
+        tool = pyproject.get("tool", {})
+        poetry = tool.get("poetry", {}) if isinstance(tool, dict) else None
+        if not isinstance(project, dict) or not isinstance(poetry, dict):
+            return NOT_PARSED
+        dependencies = project.get("dependencies", [])
+        poetry_dependencies = poetry.get("dependencies", {})
+        if not isinstance(dependencies, list) or not isinstance(poetry_dependencies, dict):
+            return NOT_PARSED
+        
+        dependencies = list(dependencies)
+        for name, spec in poetry_dependencies.items():
+            if name == "python":
+                continue
+            dependencies.append(_poetry_requirement(name, spec))
+        return dependencies
+    
+    def _parse_package_json(self, package_json: str) -> Union[Dict[str, List[str]], str]:
+        """Extract runtime and development dependencies from package.json."""
+        with open(package_json) as f:
+            try:
+                package = json.load(f)
+            except ValueError:
+                return NOT_PARSED
+        
+        if not isinstance(package, dict):
+            return NOT_PARSED
+        sections = {key: package.get(key, {}) for key in ("dependencies", "devDependencies")}
+        if not all(isinstance(section, dict) for section in sections.values()):
+            return NOT_PARSED
+        return {
+            key: [f"{name}@{version}" for name, version in section.items()]
+            for key, section in sections.items()
+        }
\ No newline at end of file
@@ -1,22 +1,35 @@
-from typing import Dict, List
+from typing import Dict, IO, List
 from crewai import Agent, Task
+import asyncio
+import json
 import os
-import markdown
+from pathlib import Path
 from jinja2 import Environment, FileSystemLoader
+from markdown_it import MarkdownIt
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage
+from research_writer.batch import chat_request
+from research_writer.cache import disk_memoize
+from research_writer.llm import ConcurrencyLimit, SharedAsyncOpenAI, aexecute_task, ainvoke_with_retry, chat_model, llm_identity, summarize_analysis, system_message
+
 
 class WriterAgent:
     """Agent responsible for writing documentation based on repository analysis."""
     
     def __init__(self, api_key: str = None,
-                 template_path: str = None):
+                 template_path: str = None,
+                 max_concurrency: int = 6,
+                 openai_client: SharedAsyncOpenAI = None,
+                 concurrency_limit: ConcurrencyLimit = None):
         """
         Initialize the writer agent.
         
         Args:
             api_key: OpenAI API key
             template_path: Optional path to custom templates directory
+            max_concurrency: Maximum number of LLM requests in flight at once
+            openai_client: Optional OpenAI client shared between agents
+            concurrency_limit: Optional limit shared between agents; overrides max_concurrency
         """
         if api_key is None:
             load_dotenv()
@@ -24,10 +37,7 @@ class WriterAgent:
             if api_key is None:
                 raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
         
-        self.llm = ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-3.5-turbo"
-        )
+        self.llm = chat_model(temperature=0.7, openai_client=openai_client)
         
         self.agent = Agent(
             role='Technical Writer',
@@ -40,42 +50,202 @@ class WriterAgent:
             verbose=True
         )
         
+        self._system_msg = system_message(self.agent)
+        # JSON mode lets several sections be requested in a single round-trip
+        self._json_llm = self.llm.bind(response_format={"type": "json_object"})
+        self._limit = concurrency_limit or ConcurrencyLimit(max_concurrency)
+        self._cache_identity = llm_identity(self.llm, self._system_msg)
+        self._cacheable = True
+        
+        self._setup_rendering(template_path)
+    
+    def _setup_rendering(self, template_path: str = None) -> None:
+        """Load the templates and Markdown parser used to render the documentation."""
         self.template_path = template_path or os.path.join(
             os.path.dirname(__file__), "templates"
         )
-        self.env = Environment(loader=FileSystemLoader(self.template_path))
+        # Templates are loaded once up front; auto_reload=False stops Jinja from
+        # stat()ing the template files on every render.
+        self.env = Environment(
+            loader=FileSystemLoader(self.template_path),
+            auto_reload=False,
+            cache_size=-1
+        )
+        self._templates = {
+            name: self.env.get_template(name)
+            for name in ("structure.md.j2", "contributors.md.j2", "dependencies.md.j2", "main.md.j2")
+        }
+        # The Markdown parser is built once and reused for every HTML conversion
+        self._md = MarkdownIt("commonmark", {"html": True}).enable(["table", "strikethrough"])
     
     def generate_documentation(self, analysis_results: Dict, output_path: str) -> None:
         """
         Generate documentation from repository analysis results.
         
+        Synchronous wrapper around agenerate_documentation for CLI callers.
+        
+        Args:
+            analysis_results: Dictionary containing repository analysis
+            output_path: Path where documentation should be saved
+        """
+        asyncio.run(self.agenerate_documentation(analysis_results, output_path))
+    
+    async def agenerate_documentation(self, analysis_results: Dict, output_path: str) -> None:
+        """
+        Generate documentation from repository analysis results.
+        
+        The LLM-backed sections are requested together in a single call.
+        
+        Args:
+            analysis_results: Dictionary containing repository analysis
+            output_path: Path where documentation should be saved
+        """
+        include_deployment = 'deployment' in analysis_results
+        sections = await self._agen_all_sections(summarize_analysis(analysis_results), include_deployment)
+        sections.update(self._generate_template_sections(analysis_results))
+        
+        self.write_documentation(sections, output_path)
+    
+    async def agenerate_sections_except_deployment(self, analysis_results: Dict) -> Dict[str, str]:
+        """
+        Generate every documentation section that only depends on the research analysis.
+        
+        Args:
+            analysis_results: Dictionary containing repository analysis
+            
+        Returns:
+            Dictionary mapping section names to their content
+        """
+        sections = await self._agen_all_sections(summarize_analysis(analysis_results))
+        sections.update(self._generate_template_sections(analysis_results))
+        return sections
+    
+    def batch_requests(self, analysis_results: Dict) -> Dict[str, Dict]:
+        """
+        Build the LLM requests for the sections that only depend on the research
+        analysis, for submission through the Batch API.
+        
+        Args:
+            analysis_results: Dictionary containing repository analysis
+            
+        Returns:
+            Dictionary mapping section names to chat completion request bodies
+        """
+        digest = summarize_analysis(analysis_results)
+        tasks = {
+            "overview": self._overview_task(digest),
+            "architecture": self._architecture_task(digest),
+            "code_analysis": self._code_analysis_task(digest),
+        }
+        return {name: chat_request(self.llm, self._system_msg.content, task) for name, task in tasks.items()}
+    
+    def deployment_batch_request(self, deployment_configs: Dict) -> Dict:
+        """
+        Build the LLM request for the deployment section, for submission through the Batch API.
+        
+        Args:
+            deployment_configs: Dictionary containing deployment configurations
+            
+        Returns:
+            Chat completion request body
+        """
+        return chat_request(self.llm, self._system_msg.content, self._deployment_section_task(deployment_configs))
+    
+    def sections_from_batch(self, analysis_results: Dict, results: Dict[str, str]) -> Dict[str, str]:
+        """
+        Assemble the documentation sections from LLM results obtained through the Batch API.
+        
         Args:
             analysis_results: Dictionary containing repository analysis
+            results: Responses to the requests built by batch_requests
+            
+        Returns:
+            Dictionary mapping section names to their content
+        """
+        sections = dict(results)
+        sections.update(self._generate_template_sections(analysis_results))
+        return sections
+    
+    def write_documentation(self, sections: Dict[str, str], output_path: str) -> None:
+        """
+        Combine generated sections and save them to output_path.
+        
+        Args:
+            sections: Dictionary mapping section names to their content
             output_path: Path where documentation should be saved
         """
-        # Generate each section of the documentation
-        sections = {
-            "overview": self._generate_overview(analysis_results),
-            "architecture": self._generate_architecture(analysis_results),
-            "code_analysis": self._generate_code_analysis(analysis_results),
-            "structure": self._generate_structure(analysis_results),
-            "contributors": self._generate_contributors(analysis_results),
-            "dependencies": self._generate_dependencies(analysis_results),
+        self._save_documentation(sections, output_path)
+    
+    async def _aexecute_task(self, task: Task) -> str:
+        """Run a task against the LLM without blocking the event loop."""
+        return await aexecute_task(self.llm, self._system_msg, self._limit, task)
+    
+    @disk_memoize()
+    async def _agen_all_sections(self, analysis: Dict, include_deployment: bool = False) -> Dict[str, str]:
+        """
+        Generate the LLM-backed sections with a single JSON-mode request.
+        
+        Falls back to one concurrent request per section if the response
+        cannot be parsed or is missing a section.
+        
+        Args:
+            analysis: Dictionary containing repository analysis
+            include_deployment: Whether to also generate the deployment section
+                from analysis['deployment']
+            
+        Returns:
+            Dictionary mapping section names to their content
+        """
+        tasks = {
+            "overview": self._overview_task(analysis),
+            "architecture": self._architecture_task(analysis),
+            "code_analysis": self._code_analysis_task(analysis),
         }
+        if include_deployment:
+            tasks["deployment"] = self._deployment_section_task(analysis['deployment'])
         
-        # Add deployment section if available
-        if 'deployment' in analysis_results:
-            sections["deployment"] = self._generate_deployment_section(analysis_results['deployment'])
+        prompt = "\n\n".join(
+            f"## {name}\n{task.description}\n\nExpected output: {task.expected_output}"
+            for name, task in tasks.items()
+        )
+        messages = [
+            self._system_msg,
+            HumanMessage(content=(
+                "Write each of the documentation sections described below. Respond with a "
+                f"JSON object with the keys {', '.join(tasks)}, where each value is the "
+                f"Markdown content of that section.\n\n{prompt}"
+            )),
+        ]
+        async with self._limit:
+            response = await ainvoke_with_retry(self._json_llm, messages)
         
-        # Combine all sections
-        doc = self._combine_sections(sections)
+        try:
+            sections = json.loads(response.content)
+            if all(isinstance(sections.get(name), str) for name in tasks):
+                return {name: sections[name] for name in tasks}
+        except (ValueError, AttributeError):
+            pass
         
-        # Save the documentation
-        self._save_documentation(doc, output_path)
+        # Per-section results are cached on their own, so a retried run only
+        # regenerates the sections that did not complete
+        generators = [
+            self._agen_overview(analysis),
+            self._agen_architecture(analysis),
+            self._agen_code_analysis(analysis),
+        ]
+        if include_deployment:
+            generators.append(self._agen_deployment_section(analysis['deployment']))
+        results = await asyncio.gather(*generators)
+        return dict(zip(tasks, results))
     
-    def _generate_overview(self, analysis: Dict) -> str:
+    @disk_memoize()
+    async def _agen_overview(self, analysis: Dict) -> str:
         """Generate the overview section using the agent."""
-        task = Task(
+        return await self._aexecute_task(self._overview_task(analysis))
+    
+    def _overview_task(self, analysis: Dict) -> Task:
+        """Build the task describing the overview section."""
+        return Task(
             description=f"""Create a clear overview section for the repository documentation
             using this information: {analysis['basic_info']}
             
@@ -85,11 +255,15 @@ class WriterAgent:
             3. High-level description""",
             expected_output="A comprehensive overview section for the documentation"
         )
-        return self.agent.execute_task(task)
     
-    def _generate_architecture(self, analysis: Dict) -> str:
+    @disk_memoize()
+    async def _agen_architecture(self, analysis: Dict) -> str:
         """Generate the architecture section using the agent."""
-        task = Task(
+        return await self._aexecute_task(self._architecture_task(analysis))
+    
+    def _architecture_task(self, analysis: Dict) -> Task:
+        """Build the task describing the architecture section."""
+        return Task(
             description=f"""Create a detailed architecture section based on this analysis:
             {analysis['code_analysis']['architecture']}
             
@@ -99,11 +273,15 @@ class WriterAgent:
             3. Design decisions and their rationale""",
             expected_output="A detailed description of the repository's architecture"
         )
-        return self.agent.execute_task(task)
     
-    def _generate_code_analysis(self, analysis: Dict) -> str:
+    @disk_memoize()
+    async def _agen_code_analysis(self, analysis: Dict) -> str:
         """Generate the code analysis section using the agent."""
-        task = Task(
+        return await self._aexecute_task(self._code_analysis_task(analysis))
+    
+    def _code_analysis_task(self, analysis: Dict) -> Task:
+        """Build the task describing the code analysis section."""
+        return Task(
             description=f"""Create a comprehensive code analysis section using this information:
             {analysis['code_analysis']}
             
@@ -113,31 +291,48 @@ class WriterAgent:
             3. Code organization and structure""",
             expected_output="A detailed analysis of the codebase"
         )
-        return self.agent.execute_task(task)
+    
+    def _generate_template_sections(self, analysis: Dict) -> Dict[str, str]:
+        """Generate the sections rendered from templates, which need no LLM call."""
+        return {
+            "structure": self._generate_structure(analysis),
+            "contributors": self._generate_contributors(analysis),
+            "dependencies": self._generate_dependencies(analysis),
+        }
     
     def _generate_structure(self, analysis: Dict) -> str:
         """Generate the structure section."""
-        template = self.env.get_template("structure.md.j2")
+        template = self._templates["structure.md.j2"]
         return template.render(structure=analysis["structure"])
     
     def _generate_contributors(self, analysis: Dict) -> str:
         """Generate the contributors section."""
-        template = self.env.get_template("contributors.md.j2")
+        template = self._templates["contributors.md.j2"]
         return template.render(contributors=analysis["contributors"])
     
     def _generate_dependencies(self, analysis: Dict) -> str:
         """Generate the dependencies section."""
-        template = self.env.get_template("dependencies.md.j2")
+        template = self._templates["dependencies.md.j2"]
         return template.render(dependencies=analysis["dependencies"])
     
-    def _combine_sections(self, sections: Dict[str, str]) -> str:
-        """Combine all documentation sections."""
-        template = self.env.get_template("main.md.j2")
-        return template.render(sections=sections)
+    def _stream_sections(self, sections: Dict[str, str], fp: IO[str], html: bool = False) -> None:
+        """Combine all documentation sections, writing them to fp as they are rendered."""
+        template = self._templates["main.md.j2"]
+        if html:
+            # Markdown is converted as one document: splitting it would break
+            # constructs spanning blocks, such as reference links
+            fp.write(self._md.render(template.render(sections=sections)))
+        else:
+            fp.writelines(template.generate(sections=sections))
     
-    def _generate_deployment_section(self, deployment_configs: Dict) -> str:
+    @disk_memoize()
+    async def _agen_deployment_section(self, deployment_configs: Dict) -> str:
         """Generate the deployment configuration section."""
-        task = Task(
+        return await self._aexecute_task(self._deployment_section_task(deployment_configs))
+    
+    def _deployment_section_task(self, deployment_configs: Dict) -> Task:
+        """Build the task describing the deployment section."""
+        return Task(
             description=f"""Create a comprehensive deployment section using these configurations:
             Docker: {deployment_configs.get('docker')}
             Kubernetes: {deployment_configs.get('k8s')}
@@ -151,17 +346,14 @@ class WriterAgent:
             4. Environment setup requirements""",
             expected_output="A detailed deployment configuration section"
         )
-        return self.agent.execute_task(task)
 
-    def _save_documentation(self, content: str, output_path: str) -> None:
+    def _save_documentation(self, sections: Dict[str, str], output_path: str) -> None:
         """Save the documentation to file."""
-        # Convert markdown to HTML if output is HTML
-        if output_path.endswith('.html'):
-            content = markdown.markdown(content)
+        path = Path(output_path)
         
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        # Create directory if it doesn't exist; the parent of a bare file name is "."
+        path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Write the file
-        with open(output_path, 'w') as f:
-            f.write(content)
\ No newline at end of file
+        # Stream the file, converting markdown to HTML if output is HTML
+        with path.open('w', buffering=1 << 20) as f:
+            self._stream_sections(sections, f, html=path.suffix == '.html')
\ No newline at end of file
@@ -0,0 +1,95 @@
+import io
+import json
+import time
+from typing import Dict
+from crewai import Task
+from langchain_openai import ChatOpenAI
+from openai import OpenAI
+from research_writer.llm import task_message
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def chat_request(llm: ChatOpenAI, system_prompt: str, task: Task) -> Dict:
+    """Build a chat completion request body for a task, using the model settings of llm."""
+    return {
+        "model": llm.model_name,
+        "temperature": llm.temperature,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": task_message(task).content},
+        ],
+    }
+
+
+class BatchRunner:
+    """Runs chat completion requests through the OpenAI Batch API."""
+
+    def __init__(self, api_key: str = None, poll_interval: float = 30.0,
+                 completion_window: str = "24h"):
+        """
+        Initialize the batch runner.
+
+        Args:
+            api_key: OpenAI API key
+            poll_interval: Seconds to wait between batch status checks
+            completion_window: Time frame within which the batch should be processed
+        """
+        self.client = OpenAI(api_key=api_key)
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    def run(self, requests: Dict[str, Dict[str, Dict]]) -> Dict[str, Dict[str, str]]:
+        """
+        Submit requests as a single batch and wait for the results.
+
+        Args:
+            requests: Dictionary mapping a group name (usually an agent) to a
+                dictionary of request names and chat completion request bodies
+
+        Returns:
+            Dictionary with the same groups and names, mapping to response contents
+        """
+        lines = [
+            json.dumps({"custom_id": f"{group}:{name}", "method": "POST", "url": BATCH_ENDPOINT, "body": body})
+            for group, group_requests in requests.items()
+            for name, body in group_requests.items()
+        ]
+        input_file = self.client.files.create(
+            file=("batch.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window
+        )
+
+        while batch.status not in TERMINAL_STATUSES:
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or batch.output_file_id is None:
+            raise RuntimeError(f"Batch {batch.id} did not complete: {batch.status}")
+
+        contents = {}
+        output = self.client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                raise RuntimeError(f"Batch request {record['custom_id']} failed: {record.get('error') or response}")
+            contents[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+
+        results = {}
+        for group, group_requests in requests.items():
+            results[group] = {}
+            for name in group_requests:
+                custom_id = f"{group}:{name}"
+                if custom_id not in contents:
+                    raise RuntimeError(f"Batch {batch.id} returned no result for {custom_id}")
+                results[group][name] = contents[custom_id]
+        return results
@@ -0,0 +1,124 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, Optional
+
+DEFAULT_CACHE_DIR = os.getenv("RESEARCH_WRITER_CACHE_DIR", "~/.cache/research_writer")
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+
+def disk_memoize(cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 key: Optional[Callable[..., Optional[str]]] = None) -> Callable:
+    """
+    Memoize a method's results on disk.
+
+    Results are pickled into cache_dir under a SHA256 of the method's qualified
+    name, the instance's _cache_identity (e.g. the model, temperature and system
+    prompt producing the result) and its JSON-encoded arguments (excluding self).
+    Instances whose _cacheable attribute is missing or false bypass the cache.
+    Both plain and async methods are supported. The cache is trimmed to
+    max_bytes, evicting the least recently used entries first.
+
+    Args:
+        cache_dir: Directory holding the cached results
+        max_bytes: Maximum total size of the cache directory
+        key: Optional callable receiving the method arguments and returning extra
+            key material, e.g. a commit sha. Returning None bypasses the cache.
+    """
+    cache_dir = os.path.expanduser(cache_dir)
+
+    def decorator(fn: Callable) -> Callable:
+        def cache_path(instance, args, kwargs) -> Optional[str]:
+            if not getattr(instance, "_cacheable", False):
+                return None
+            extra = None
+            if key is not None:
+                extra = key(*args, **kwargs)
+                if extra is None:
+                    return None
+            identity = getattr(instance, "_cache_identity", None)
+            payload = json.dumps([fn.__qualname__, identity, extra, args, kwargs], sort_keys=True, default=str)
+            digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+            return os.path.join(cache_dir, f"{digest}.pkl")
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(self, *args, **kwargs):
+                path = cache_path(self, args, kwargs)
+                hit, result = _load(path)
+                if not hit:
+                    result = await fn(self, *args, **kwargs)
+                    _store(path, result, max_bytes)
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            path = cache_path(self, args, kwargs)
+            hit, result = _load(path)
+            if not hit:
+                result = fn(self, *args, **kwargs)
+                _store(path, result, max_bytes)
+            return result
+        return wrapper
+
+    return decorator
+
+
+def _load(path: Optional[str]):
+    """Return (hit, value) for a cache entry, marking it as recently used on a hit."""
+    if path is None:
+        return False, None
+    try:
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return False, None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return True, value
+
+
+def _store(path: Optional[str], value: Any, max_bytes: int) -> None:
+    """Atomically write a cache entry and evict old entries beyond max_bytes."""
+    if path is None:
+        return
+    cache_dir = os.path.dirname(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f)
+        os.replace(tmp_path, path)
+        _evict(cache_dir, max_bytes)
+    except OSError:
+        # Caching is best effort; a read-only or full disk must not break a run
+        pass
+
+
+def _evict(cache_dir: str, max_bytes: int) -> None:
+    """Delete least recently used entries until the cache fits in max_bytes."""
+    entries = []
+    total = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
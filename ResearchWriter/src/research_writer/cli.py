@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 import argparse
 import os
-from research_writer.main import RepoDocumentationCrew
-from dotenv import load_dotenv
+
+def positive_int(value):
+    """Parse a command line value as an integer of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -26,6 +31,19 @@ def parse_args():
         help="OpenAI API key. If not provided, will look for OPENAI_API_KEY in environment."
     )
     
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Send LLM requests through the OpenAI Batch API (half the cost; up to three batches run one after another, each may take up to 24 hours)"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=8,
+        help="Maximum number of concurrent LLM requests (default: 8)"
+    )
+    
     return parser.parse_args()
 
 def main():
@@ -39,6 +57,7 @@ def main():
         # Load API key from environment if not provided
     api_key = args.api_key
     if api_key is None:
+        from dotenv import load_dotenv
         load_dotenv()
         api_key = os.getenv("OPENAI_API_KEY")
         if api_key is None:
@@ -48,13 +67,17 @@ def main():
             print("3. Provide the API key using --api-key argument")
             return 1
     
+    # Imported here so --help and argument errors don't pay for loading
+    # crewai, langchain and the other agent dependencies
+    from research_writer.main import RepoDocumentationCrew
+    
     try:
         # Initialize the documentation crew
-        crew = RepoDocumentationCrew(api_key=api_key)
+        crew = RepoDocumentationCrew(api_key=api_key, concurrency=args.concurrency)
         
         # Generate documentation
         print(f"Analyzing repository: {args.repo}")
-        crew.generate_documentation(args.repo, args.output)
+        crew.generate_documentation(args.repo, args.output, batch=args.batch)
         
         print(f"Documentation generated successfully: {args.output}")
         return 0
@@ -0,0 +1,248 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import httpx
+from crewai import Agent, Task
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+
+class ConcurrencyLimit:
+    """
+    Async context manager bounding the number of LLM calls in flight.
+
+    One instance can be shared between agents so the bound applies to all of
+    them. The underlying semaphore is created per event loop, so the limit
+    stays usable across successive asyncio.run() calls.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Initialize the limit.
+
+        Args:
+            limit: Maximum number of concurrent calls
+        """
+        if limit < 1:
+            # A zero-sized semaphore would block every call forever
+            raise ValueError(f"Concurrency limit must be at least 1, got {limit}")
+        self.limit = limit
+        self._semaphore = None
+        self._loop = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Return the semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+        return self._semaphore
+
+    async def __aenter__(self) -> "ConcurrencyLimit":
+        await self._get_semaphore().acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._get_semaphore().release()
+
+
+class SharedAsyncOpenAI:
+    """
+    AsyncOpenAI client shared between agents.
+
+    Concurrent requests from every agent reuse one keep-alive connection pool.
+    The pool is bound to the event loop it was created on, so like
+    ConcurrencyLimit a new client is created for each event loop. It can be
+    passed to ChatOpenAI as its root_async_client, and chat.completions as its
+    async_client; other client attributes are looked up when a request is made.
+    """
+
+    def __init__(self, max_connections: int = 64, max_keepalive_connections: int = 32,
+                 transport: Optional[httpx.AsyncBaseTransport] = None, **client_kwargs):
+        """
+        Initialize the shared client.
+
+        Args:
+            max_connections: Maximum number of open connections
+            max_keepalive_connections: Maximum number of idle connections kept open
+            transport: Optional transport for the HTTP client, e.g. a mock in tests
+            client_kwargs: Keyword arguments for AsyncOpenAI, e.g. api_key
+        """
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self._transport = transport
+        self._client_kwargs = client_kwargs
+        self._client = None
+        self._loop = None
+        self.chat = _SharedChat(self)
+
+    def get(self) -> AsyncOpenAI:
+        """Return the client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = AsyncOpenAI(
+                http_client=httpx.AsyncClient(limits=self._limits, transport=self._transport),
+                **self._client_kwargs
+            )
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the client of the running event loop and its connections."""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.close()
+        self._client = None
+        self._loop = None
+
+    def __getattr__(self, name: str) -> Any:
+        # Private and special names are not forwarded, so copying or inspecting
+        # the object does not create a client outside an event loop
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+
+class _SharedChat:
+    """Stands in for AsyncOpenAI.chat, resolving the client when a request is made."""
+
+    def __init__(self, shared: SharedAsyncOpenAI):
+        self.completions = _SharedCompletions(shared)
+
+
+class _SharedCompletions:
+    """Stands in for AsyncOpenAI.chat.completions, forwarding to the running loop's client."""
+
+    def __init__(self, shared: SharedAsyncOpenAI):
+        self._shared = shared
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._shared.get().chat.completions, name)
+
+
+async def ainvoke_with_retry(llm: Runnable, messages: List[BaseMessage],
+                             max_attempts: int = 6) -> Any:
+    """
+    Invoke an LLM, retrying with exponential backoff on transient errors.
+
+    Rate limits, 5xx responses, dropped connections and timeouts are retried.
+    This is the only retry layer, as the OpenAI clients are created with
+    max_retries=0.
+
+    Args:
+        llm: Chat model to invoke
+        messages: Messages to send
+        max_attempts: Maximum number of attempts before the error is raised
+
+    Returns:
+        The model response
+    """
+    async for attempt in AsyncRetrying(
+        wait=wait_exponential(multiplier=1, max=60),
+        # APIConnectionError also covers timeouts
+        retry=retry_if_exception_type((RateLimitError, InternalServerError, APIConnectionError)),
+        stop=stop_after_attempt(max_attempts),
+        reraise=True
+    ):
+        with attempt:
+            response = await llm.ainvoke(messages)
+    return response
+
+
+def chat_model(temperature: float, openai_client: Optional[SharedAsyncOpenAI] = None) -> ChatOpenAI:
+    """
+    Build the chat model of an agent.
+
+    Args:
+        temperature: Sampling temperature
+        openai_client: Optional client shared between agents
+
+    Returns:
+        The chat model
+    """
+    return ChatOpenAI(
+        temperature=temperature,
+        model_name="gpt-3.5-turbo",
+        # Retries are handled by ainvoke_with_retry alone
+        max_retries=0,
+        # Plain requests go through async_client, structured output ones
+        # (e.g. response_format) through root_async_client
+        async_client=openai_client.chat.completions if openai_client else None,
+        root_async_client=openai_client
+    )
+
+
+async def aexecute_task(llm: Runnable, system_msg: SystemMessage, limit: ConcurrencyLimit, task: Task) -> str:
+    """
+    Run a crewai task against an LLM without blocking the event loop.
+
+    crewai agents execute tasks synchronously, so the agents call their LLM
+    directly, using the agent's persona as the system message.
+
+    Args:
+        llm: Chat model to invoke
+        system_msg: System message carrying the agent's persona
+        limit: Limit on the number of LLM calls in flight
+        task: Task to carry out
+
+    Returns:
+        The response content
+    """
+    async with limit:
+        response = await ainvoke_with_retry(llm, [system_msg, task_message(task)])
+    return response.content
+
+
+def system_message(agent: Agent) -> SystemMessage:
+    """Build a system message carrying the role, backstory and goal of a crewai agent."""
+    return SystemMessage(content=f"You are a {agent.role}. {agent.backstory}\nGoal: {agent.goal}")
+
+
+def task_message(task: Task) -> HumanMessage:
+    """Build the user message asking the LLM to carry out a crewai task."""
+    return HumanMessage(content=f"{task.description}\n\nExpected output: {task.expected_output}")
+
+
+def llm_identity(llm: Runnable, system_msg: SystemMessage) -> List:
+    """Describe the model settings and persona producing an agent's output, for use in cache keys."""
+    return [llm.model_name, llm.temperature, system_msg.content]
+
+
+def summarize_analysis(analysis: Dict, max_files_per_dir: int = 10, max_dirs: int = 100) -> Dict:
+    """
+    Prepare a repository analysis for use in prompts.
+
+    Returns a shallow copy whose bulky fields are rendered once into bounded
+    strings: the structure keeps at most max_files_per_dir files for each of
+    the first max_dirs directories, and languages become a list sorted by
+    file count.
+
+    Args:
+        analysis: Dictionary containing repository analysis
+        max_files_per_dir: Maximum number of files listed per directory
+        max_dirs: Maximum number of directories listed
+
+    Returns:
+        Dictionary with the same keys as analysis
+    """
+    structure = analysis.get("structure", {})
+    lines = []
+    for path, files in list(structure.items())[:max_dirs]:
+        line = f"{path}: {', '.join(files[:max_files_per_dir])}"
+        if len(files) > max_files_per_dir:
+            line += f" (+{len(files) - max_files_per_dir} more)"
+        lines.append(line)
+    if len(structure) > max_dirs:
+        lines.append(f"(+{len(structure) - max_dirs} more directories)")
+
+    code_analysis = dict(analysis.get("code_analysis", {}))
+    languages = sorted(code_analysis.get("languages", {}).items(), key=lambda item: (-item[1], item[0]))
+    code_analysis["languages"] = ", ".join(f"{ext} ({count} files)" for ext, count in languages)
+
+    digest = dict(analysis)
+    digest["structure"] = "\n".join(lines)
+    digest["code_analysis"] = code_analysis
+    return digest
@@ -1,19 +1,24 @@
+from typing import Dict
 from crewai import Crew, Process
 from research_writer.agents.research_agent import ResearchAgent
 from research_writer.agents.writer_agent import WriterAgent
 from research_writer.agents.deployment_agent import DeploymentAgent
+from research_writer.batch import BatchRunner
+from research_writer.llm import ConcurrencyLimit, SharedAsyncOpenAI
+import asyncio
 import os
 from dotenv import load_dotenv
 
 class RepoDocumentationCrew:
     """Orchestrates the repository analysis and documentation generation process."""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, concurrency: int = 8):
         """
         Initialize the documentation crew.
         
         Args:
             api_key: OpenAI API key. If not provided, will look for OPENAI_API_KEY in environment.
+            concurrency: Maximum number of LLM requests in flight across all agents
         """
         if api_key is None:
             load_dotenv()
@@ -21,9 +26,23 @@ class RepoDocumentationCrew:
             if api_key is None:
                 raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
         
-        self.research_agent = ResearchAgent(api_key=api_key)
-        self.writer_agent = WriterAgent(api_key=api_key)
-        self.deployment_agent = DeploymentAgent(api_key=api_key)
+        self.api_key = api_key
+        
+        # One client and connection pool for every agent, so concurrent requests
+        # reuse keep-alive connections instead of each agent opening its own.
+        # It is created per event loop and closed at the end of each run.
+        self._openai = SharedAsyncOpenAI(
+            api_key=api_key,
+            # Retries are handled by ainvoke_with_retry alone, so a rate limited
+            # request does not hold its concurrency slot through two backoff loops
+            max_retries=0
+        )
+        
+        limit = ConcurrencyLimit(concurrency)
+        
+        self.research_agent = ResearchAgent(api_key=api_key, openai_client=self._openai, concurrency_limit=limit)
+        self.writer_agent = WriterAgent(api_key=api_key, openai_client=self._openai, concurrency_limit=limit)
+        self.deployment_agent = DeploymentAgent(api_key=api_key, openai_client=self._openai, concurrency_limit=limit)
         
         self.crew = Crew(
             agents=[self.research_agent.agent, self.writer_agent.agent, self.deployment_agent.agent],
@@ -32,10 +51,34 @@ class RepoDocumentationCrew:
             verbose=True
         )
     
-    def generate_documentation(self, repo_path: str, output_path: str, include_deployment: bool = True) -> None:
+    def generate_documentation(self, repo_path: str, output_path: str, include_deployment: bool = True,
+                               batch: bool = False) -> None:
         """
         Analyze repository and generate documentation.
         
+        Synchronous wrapper around agenerate_documentation.
+        
+        Args:
+            repo_path: Path to the git repository
+            output_path: Path where documentation should be saved
+            include_deployment: Whether to include deployment configurations
+            batch: Whether to send LLM requests through the OpenAI Batch API,
+                which is cheaper but runs up to three batches one after another,
+                each of which may take up to 24 hours
+        """
+        if batch:
+            self._generate_documentation_batch(repo_path, output_path, include_deployment)
+        else:
+            asyncio.run(self.agenerate_documentation(repo_path, output_path, include_deployment))
+    
+    async def agenerate_documentation(self, repo_path: str, output_path: str, include_deployment: bool = True) -> None:
+        """
+        Analyze repository and generate documentation.
+        
+        Once the research stage is done, the writer sections that only need the
+        analysis run concurrently with the deployment agent; only the deployment
+        section waits for the deployment configurations.
+        
         Args:
             repo_path: Path to the git repository
             output_path: Path where documentation should be saved
@@ -45,16 +88,69 @@ class RepoDocumentationCrew:
         if not os.path.exists(repo_path):
             raise ValueError(f"Repository path does not exist: {repo_path}")
         
+        try:
+            # Analyze the repository
+            # The documentation may be written into the repository itself; that
+            # alone should not stop later runs from reusing the cached analysis
+            analysis_results = await self.research_agent.aanalyze_repository(repo_path, ignore_paths=[output_path])
+            
+            # Generate deployment configurations if requested, overlapping them
+            # with the writer sections that do not depend on deployment
+            if include_deployment:
+                sections, deployment_section = await asyncio.gather(
+                    self.writer_agent.agenerate_sections_except_deployment(analysis_results),
+                    self._agenerate_deployment_section(analysis_results),
+                )
+                sections["deployment"] = deployment_section
+            else:
+                sections = await self.writer_agent.agenerate_sections_except_deployment(analysis_results)
+            
+            # Generate documentation
+            self.writer_agent.write_documentation(sections, output_path)
+        finally:
+            # The client's connections belong to this event loop; release them
+            # so a later run on a new loop starts with a fresh client
+            await self._openai.aclose()
+    
+    async def _agenerate_deployment_section(self, analysis_results: Dict) -> str:
+        """Generate deployment configurations and the documentation section describing them."""
+        deployment_configs = await self.deployment_agent.agenerate_deployment_config(analysis_results)
+        return await self.writer_agent._agen_deployment_section(deployment_configs)
+    
+    def _generate_documentation_batch(self, repo_path: str, output_path: str, include_deployment: bool) -> None:
+        """
+        Analyze repository and generate documentation through the OpenAI Batch API.
+        
+        Requests are grouped into as few batches as the dependencies between
+        agents allow: research, then writer and deployment together, then the
+        deployment section.
+        """
+        # Ensure the repository path exists
+        if not os.path.exists(repo_path):
+            raise ValueError(f"Repository path does not exist: {repo_path}")
+        
+        runner = BatchRunner(api_key=self.api_key)
+        
         # Analyze the repository
-        analysis_results = self.research_agent.analyze_repository(repo_path)
+        results = runner.run({"research": self.research_agent.batch_requests(repo_path)})
+        analysis_results = self.research_agent.analysis_from_batch(repo_path, results["research"])
+        
+        requests = {"writer": self.writer_agent.batch_requests(analysis_results)}
+        if include_deployment:
+            requests["deployment"] = self.deployment_agent.batch_requests(analysis_results)
+        results = runner.run(requests)
+        sections = self.writer_agent.sections_from_batch(analysis_results, results["writer"])
         
         # Generate deployment configurations if requested
         if include_deployment:
-            deployment_configs = self.deployment_agent.generate_deployment_config(analysis_results)
-            analysis_results['deployment'] = deployment_configs
+            deployment_configs = self.deployment_agent.deployment_config_from_batch(results["deployment"])
+            results = runner.run({
+                "writer": {"deployment": self.writer_agent.deployment_batch_request(deployment_configs)}
+            })
+            sections["deployment"] = results["writer"]["deployment"]
         
         # Generate documentation
-        self.writer_agent.generate_documentation(analysis_results, output_path)
+        self.writer_agent.write_documentation(sections, output_path)
 
 def main():
     # Example usage
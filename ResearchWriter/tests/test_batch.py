@@ -0,0 +1,93 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from research_writer.batch import BatchRunner
+
+
+class FakeOpenAI:
+    """Records the submitted batch and answers each request with its custom_id."""
+
+    def __init__(self, statuses=("in_progress", "completed"), skip=(), errors=()):
+        self.statuses = list(statuses)
+        self.skip = set(skip)
+        self.errors = set(errors)
+        self.submitted = []
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+
+    def _create_file(self, file, purpose):
+        name, data = file
+        self.submitted = [json.loads(line) for line in data.read().decode("utf-8").splitlines()]
+        return SimpleNamespace(id="file-input")
+
+    def _batch(self):
+        status = self.statuses.pop(0)
+        return SimpleNamespace(
+            id="batch-1",
+            status=status,
+            output_file_id="file-output" if status == "completed" else None
+        )
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        assert input_file_id == "file-input"
+        return self._batch()
+
+    def _retrieve(self, batch_id):
+        return self._batch()
+
+    def _content(self, file_id):
+        lines = []
+        for request in self.submitted:
+            custom_id = request["custom_id"]
+            if custom_id in self.skip:
+                continue
+            if custom_id in self.errors:
+                record = {"custom_id": custom_id, "response": None, "error": {"message": "boom"}}
+            else:
+                body = {"choices": [{"message": {"content": f"answer to {custom_id}"}}]}
+                record = {"custom_id": custom_id, "response": {"status_code": 200, "body": body}, "error": None}
+            lines.append(json.dumps(record))
+        return SimpleNamespace(text="\n".join(lines))
+
+
+def runner_with(client):
+    runner = BatchRunner(api_key="test", poll_interval=0)
+    runner.client = client
+    return runner
+
+
+REQUESTS = {
+    "research": {"architecture": {"model": "m"}, "patterns": {"model": "m"}},
+    "writer": {"overview": {"model": "m"}},
+}
+
+
+def test_results_are_mapped_back_to_their_groups():
+    client = FakeOpenAI()
+    results = runner_with(client).run(REQUESTS)
+    assert results == {
+        "research": {"architecture": "answer to research:architecture", "patterns": "answer to research:patterns"},
+        "writer": {"overview": "answer to writer:overview"},
+    }
+    assert [request["custom_id"] for request in client.submitted] == [
+        "research:architecture", "research:patterns", "writer:overview",
+    ]
+    assert client.submitted[0]["body"] == {"model": "m"}
+
+
+@pytest.mark.parametrize("status", ["failed", "expired", "cancelled"])
+def test_unsuccessful_batch_raises(status):
+    with pytest.raises(RuntimeError, match=status):
+        runner_with(FakeOpenAI(statuses=["validating", status])).run(REQUESTS)
+
+
+def test_missing_result_raises():
+    with pytest.raises(RuntimeError, match="writer:overview"):
+        runner_with(FakeOpenAI(skip=["writer:overview"])).run(REQUESTS)
+
+
+def test_failed_request_raises():
+    with pytest.raises(RuntimeError, match="research:patterns"):
+        runner_with(FakeOpenAI(errors=["research:patterns"])).run(REQUESTS)
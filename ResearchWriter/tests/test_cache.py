@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from research_writer.cache import disk_memoize
+
+
+@pytest.fixture
+def counter_class(tmp_path):
+    class Counter:
+        _cache_identity = ["model", 0.1, "persona"]
+        _cacheable = True
+
+        def __init__(self):
+            self.calls = []
+
+        @disk_memoize(cache_dir=str(tmp_path))
+        def compute(self, value):
+            self.calls.append(value)
+            return value * 2
+
+        @disk_memoize(cache_dir=str(tmp_path))
+        async def acompute(self, value):
+            self.calls.append(value)
+            return value * 3
+
+        @disk_memoize(cache_dir=str(tmp_path), key=lambda value, revision: revision)
+        def at_revision(self, value, revision):
+            self.calls.append(value)
+            return value
+
+    return Counter
+
+
+def test_results_are_reused_across_instances(counter_class):
+    first, second = counter_class(), counter_class()
+    assert first.compute(2) == 4
+    assert second.compute(2) == 4
+    assert first.calls == [2]
+    assert second.calls == []
+
+
+def test_different_arguments_miss(counter_class):
+    counter = counter_class()
+    counter.compute(1)
+    counter.compute(2)
+    assert counter.calls == [1, 2]
+
+
+def test_async_methods_are_memoized(counter_class):
+    counter = counter_class()
+    assert asyncio.run(counter.acompute(2)) == 6
+    assert asyncio.run(counter.acompute(2)) == 6
+    assert counter.calls == [2]
+
+
+def test_identity_is_part_of_the_key(counter_class):
+    counter_class().compute(2)
+    other = counter_class()
+    other._cache_identity = ["model", 0.7, "persona"]
+    other.compute(2)
+    assert other.calls == [2]
+
+
+def test_instances_can_opt_out(counter_class, tmp_path):
+    counter = counter_class()
+    counter._cacheable = False
+    counter.compute(2)
+    counter.compute(2)
+    assert counter.calls == [2, 2]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_key_returning_none_bypasses_the_cache(counter_class, tmp_path):
+    counter = counter_class()
+    counter.at_revision(1, None)
+    counter.at_revision(1, None)
+    counter.at_revision(1, "abc")
+    counter.at_revision(1, "abc")
+    assert counter.calls == [1, 1, 1]
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    class Big:
+        _cacheable = True
+
+        def __init__(self):
+            self.calls = []
+
+        @disk_memoize(cache_dir=str(tmp_path), max_bytes=2500)
+        def compute(self, name):
+            self.calls.append(name)
+            return name * 1000
+
+    big = Big()
+    big.compute("a")
+    big.compute("b")
+    # Age both entries, then use "a" so that "b" is the least recently used
+    past = time.time() - 100
+    for entry in tmp_path.iterdir():
+        os.utime(entry, (past, past))
+    big.compute("a")
+    big.compute("c")
+
+    assert len(list(tmp_path.iterdir())) == 2
+    big.compute("a")
+    big.compute("b")
+    assert big.calls == ["a", "b", "c", "b"]
@@ -0,0 +1,144 @@
+import json
+
+import pytest
+
+from research_writer.agents import research_agent
+from research_writer.agents.research_agent import NOT_PARSED, ResearchAgent
+
+
+@pytest.fixture
+def agent():
+    # The parsers only read files, so no LLM or API key is needed
+    return ResearchAgent.__new__(ResearchAgent)
+
+
+def write(path, content):
+    path.write_text(content)
+    return str(path)
+
+
+def test_parse_requirements_skips_comments_and_blank_lines(agent, tmp_path):
+    req_file = write(tmp_path / "requirements.txt", "# pinned\nrequests>=2.31  # http\n\nflask\n")
+    assert agent._parse_requirements(req_file) == ["requests>=2.31", "flask"]
+
+
+def test_parse_requirements_keeps_url_fragments(agent, tmp_path):
+    req_file = write(tmp_path / "requirements.txt", (
+        "-e git+https://example.com/pkg.git#egg=pkg\n"
+        "https://example.com/lib-1.0.tar.gz#sha256=abc  # pinned archive\n"
+    ))
+    assert agent._parse_requirements(req_file) == [
+        "-e git+https://example.com/pkg.git#egg=pkg",
+        "https://example.com/lib-1.0.tar.gz#sha256=abc",
+    ]
+
+
+def test_parse_setup_py_reads_install_requires(agent, tmp_path):
+    setup_file = write(tmp_path / "setup.py", (
+        "from setuptools import setup\n"
+        "setup(name='demo', install_requires=['requests>=2.31', 'flask'])\n"
+    ))
+    assert agent._parse_setup_py(setup_file) == ["requests>=2.31", "flask"]
+
+
+def test_parse_setup_py_resolves_module_level_list(agent, tmp_path):
+    setup_file = write(tmp_path / "setup.py", (
+        "import setuptools\n"
+        "REQUIRES = ['numpy']\n"
+        "setuptools.setup(name='demo', install_requires=REQUIRES)\n"
+    ))
+    assert agent._parse_setup_py(setup_file) == ["numpy"]
+
+
+def test_parse_setup_py_without_install_requires(agent, tmp_path):
+    setup_file = write(tmp_path / "setup.py", "from setuptools import setup\nsetup(name='demo')\n")
+    assert agent._parse_setup_py(setup_file) == []
+
+
+@pytest.mark.parametrize("source", [
+    "setup(\n",
+    "from setuptools import setup\nsetup(install_requires=load_requirements())\n",
+    "print('no setup call')\n",
+])
+def test_parse_setup_py_not_parsed(agent, tmp_path, source):
+    assert agent._parse_setup_py(write(tmp_path / "setup.py", source)) == NOT_PARSED
+
+
+@pytest.mark.skipif(research_agent.tomllib is None, reason="requires tomllib or tomli")
+def test_parse_pyproject_pep621(agent, tmp_path):
+    pyproject_file = write(tmp_path / "pyproject.toml", (
+        "[project]\n"
+        "name = 'demo'\n"
+        "dependencies = ['requests>=2.31', 'flask']\n"
+    ))
+    assert agent._parse_pyproject(pyproject_file) == ["requests>=2.31", "flask"]
+
+
+@pytest.mark.skipif(research_agent.tomllib is None, reason="requires tomllib or tomli")
+def test_parse_pyproject_poetry(agent, tmp_path):
+    pyproject_file = write(tmp_path / "pyproject.toml", (
+        "[tool.poetry.dependencies]\n"
+        "python = '^3.8'\n"
+        "requests = '^2.31'\n"
+        "flask = '*'\n"
+        "django = { version = '>=4.2', optional = true }\n"
+        "mylib = { git = 'https://example.com/mylib.git' }\n"
+        "numpy = [\n"
+        "    { version = '<1.25', python = '<3.9' },\n"
+        "    { version = '>=1.25', python = '>=3.9' },\n"
+        "]\n"
+    ))
+    assert agent._parse_pyproject(pyproject_file) == [
+        "requests ^2.31",
+        "flask",
+        "django >=4.2",
+        "mylib",
+        "numpy <1.25 || >=1.25",
+    ]
+
+
+@pytest.mark.skipif(research_agent.tomllib is None, reason="requires tomllib or tomli")
+@pytest.mark.parametrize("content", [
+    "[project\n",
+    "project = 'x'\n",
+    "tool = 'x'\n",
+    "[tool]\npoetry = 1\n",
+    "[project]\ndependencies = 'flask'\n",
+    "[tool.poetry]\ndependencies = ['flask']\n",
+])
+def test_parse_pyproject_not_parsed(agent, tmp_path, content):
+    assert agent._parse_pyproject(write(tmp_path / "pyproject.toml", content)) == NOT_PARSED
+
+
+def test_parse_package_json(agent, tmp_path):
+    package_json = write(tmp_path / "package.json", json.dumps({
+        "name": "demo",
+        "dependencies": {"react": "^18.2.0"},
+        "devDependencies": {"jest": "^29.0.0"},
+    }))
+    assert agent._parse_package_json(package_json) == {
+        "dependencies": ["react@^18.2.0"],
+        "devDependencies": ["jest@^29.0.0"],
+    }
+
+
+def test_parse_package_json_without_dependencies(agent, tmp_path):
+    package_json = write(tmp_path / "package.json", json.dumps({"name": "demo"}))
+    assert agent._parse_package_json(package_json) == {"dependencies": [], "devDependencies": []}
+
+
+@pytest.mark.parametrize("content", [
+    "{not json",
+    json.dumps(["react"]),
+    json.dumps({"dependencies": ["react"]}),
+])
+def test_parse_package_json_not_parsed(agent, tmp_path, content):
+    assert agent._parse_package_json(write(tmp_path / "package.json", content)) == NOT_PARSED
+
+
+def test_analyze_dependencies_skips_missing_files(agent, tmp_path):
+    write(tmp_path / "requirements.txt", "flask\n")
+    assert agent._analyze_dependencies(str(tmp_path)) == {
+        "python": {"requirements.txt": ["flask"]},
+        "javascript": {},
+    }
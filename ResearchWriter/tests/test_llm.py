@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from crewai import Task
+from langchain_core.messages import HumanMessage, SystemMessage
+from tenacity import wait_none
+
+from research_writer import llm
+from research_writer.llm import ConcurrencyLimit, aexecute_task, ainvoke_with_retry
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def status_error(cls, status_code):
+    return cls("error", response=httpx.Response(status_code, request=REQUEST), body=None)
+
+
+class FlakyLLM:
+    """Raises the given errors in turn, then answers."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        self.messages = messages
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(content="ok")
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm, "wait_exponential", lambda **kwargs: wait_none())
+
+
+@pytest.mark.parametrize("error", [
+    status_error(openai.RateLimitError, 429),
+    status_error(openai.InternalServerError, 502),
+    status_error(openai.InternalServerError, 503),
+    openai.APIConnectionError(request=REQUEST),
+    openai.APITimeoutError(request=REQUEST),
+])
+def test_ainvoke_with_retry_retries_transient_errors(error):
+    model = FlakyLLM(error, error)
+    response = asyncio.run(ainvoke_with_retry(model, []))
+    assert response.content == "ok"
+    assert model.calls == 3
+
+
+def test_ainvoke_with_retry_gives_up_after_max_attempts():
+    model = FlakyLLM(*(status_error(openai.RateLimitError, 429) for _ in range(3)))
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(ainvoke_with_retry(model, [], max_attempts=3))
+    assert model.calls == 3
+
+
+def test_ainvoke_with_retry_does_not_retry_client_errors():
+    model = FlakyLLM(status_error(openai.BadRequestError, 400))
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(ainvoke_with_retry(model, []))
+    assert model.calls == 1
+
+
+def test_concurrency_limit_bounds_calls_in_flight():
+    limit = ConcurrencyLimit(2)
+    in_flight = 0
+    peak = 0
+
+    async def call():
+        nonlocal in_flight, peak
+        async with limit:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+
+    async def run():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(run())
+    # The semaphore is recreated for a new event loop
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_concurrency_limit_rejects_zero():
+    with pytest.raises(ValueError):
+        ConcurrencyLimit(0)
+
+
+def test_aexecute_task_sends_persona_and_task():
+    model = FlakyLLM()
+    system_msg = SystemMessage(content="You are a Technical Writer.")
+    task = Task(description="Write an overview", expected_output="An overview")
+    assert asyncio.run(aexecute_task(model, system_msg, ConcurrencyLimit(1), task)) == "ok"
+    assert model.messages[0] is system_msg
+    assert isinstance(model.messages[1], HumanMessage)
+    assert model.messages[1].content == "Write an overview\n\nExpected output: An overview"
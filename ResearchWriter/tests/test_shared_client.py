@@ -0,0 +1,73 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from research_writer.agents import writer_agent
+from research_writer.agents.writer_agent import WriterAgent
+from research_writer.llm import SharedAsyncOpenAI
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-3.5-turbo",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    # Only the crewai persona is needed; the LLM wiring under test is real
+    monkeypatch.setattr(writer_agent, "Agent", lambda **kwargs: SimpleNamespace(**kwargs))
+
+    requests = []
+    sections = {"overview": "Overview", "architecture": "Architecture", "code_analysis": "Code"}
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json=completion(json.dumps(sections)))
+
+    client = SharedAsyncOpenAI(api_key="test", max_retries=0, transport=httpx.MockTransport(handler))
+    agent = WriterAgent(api_key="test", openai_client=client)
+    agent._cacheable = False
+    return agent, client, requests, sections
+
+
+def test_json_mode_sections_use_the_shared_client(writer):
+    agent, client, requests, sections = writer
+    analysis = {
+        "basic_info": {"name": "demo"},
+        "code_analysis": {"languages": ".py (1 files)", "architecture": "Layered", "patterns": []},
+    }
+
+    async def run():
+        try:
+            return await agent._agen_all_sections(analysis)
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == sections
+    assert len(requests) == 1
+    assert requests[0]["response_format"] == {"type": "json_object"}
+
+
+def test_shared_client_is_recreated_per_event_loop():
+    client = SharedAsyncOpenAI(api_key="test")
+
+    async def get():
+        first = client.get()
+        assert client.get() is first
+        await client.aclose()
+        return first
+
+    assert asyncio.run(get()) is not asyncio.run(get())
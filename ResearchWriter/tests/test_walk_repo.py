@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from research_writer.agents.research_agent import ResearchAgent
+
+
+@pytest.fixture
+def agent():
+    # The tree walk does not touch the LLM, so no API key is needed
+    return ResearchAgent.__new__(ResearchAgent)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / ".git" / "objects").mkdir(parents=True)
+    (tmp_path / ".git" / "config").write_text("")
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    for path in ("README.md", ".gitignore", "setup.py", "src/main.py", "src/pkg/util.PY", "src/pkg/data.tar.gz", "src/pkg/Makefile"):
+        (tmp_path / path).write_text("")
+    return tmp_path
+
+
+def test_walk_repo_collects_structure_and_skips_git(agent, repo):
+    structure, _ = agent._walk_repo(str(repo))
+    assert list(structure) == ["/", "src", os.path.join("src", "pkg")]
+    assert sorted(structure["/"]) == [".gitignore", "README.md", "setup.py"]
+    assert sorted(structure["src"]) == ["main.py"]
+    assert sorted(structure[os.path.join("src", "pkg")]) == ["Makefile", "data.tar.gz", "util.PY"]
+
+
+def test_walk_repo_counts_extensions(agent, repo):
+    _, languages = agent._walk_repo(str(repo))
+    # Extensions are lowercased, and a leading dot does not start one
+    assert languages == {".md": 1, ".py": 3, ".gz": 1}
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="requires symlink support")
+def test_walk_repo_does_not_follow_directory_symlinks(agent, repo):
+    try:
+        os.symlink(repo / "src", repo / "link", target_is_directory=True)
+    except OSError:
+        pytest.skip("symlinks are not permitted")
+    (repo / "file_link.py").symlink_to(repo / "setup.py")
+
+    structure, languages = agent._walk_repo(str(repo))
+    assert "link" not in structure
+    assert "link" not in structure["/"]
+    assert "file_link.py" in structure["/"]
+    assert languages[".py"] == 4
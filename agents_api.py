@@ -19,6 +19,7 @@ from __future__ import annotations
 import os
 import threading
 import uuid
+from types import SimpleNamespace
 from typing import Any, Dict, Optional
 
 from flask import Flask, Request, Response, jsonify, request
@@ -87,7 +88,7 @@ class StubAgent:
     """
 
     def execute_task(self, task: Any) -> str: #This function executes a task and returns a string
-        desc = getattr(task, "description", "") or ""
+        desc = getattr(task, "description", None) or getattr(task, "content", "") or ""
         d = desc.lower()
         if "architecture" in d or "architect" in d: #If the task is about architecture
             return "Monolithic-like architecture inferred from repository layout."
@@ -103,6 +104,9 @@ class StubAgent:
             return "DATABASE_URL, REDIS_URL"
         return "Stubbed result"
 
+    async def ainvoke(self, messages: Any) -> Any: #The agents call the LLM directly with a list of messages
+        return SimpleNamespace(content=self.execute_task(messages[-1]))
+
 
 def safe_instantiate(agent_cls, api_key: Optional[str] = None):
     """Try to instantiate the agent class with api_key; if it fails return a
@@ -118,11 +122,15 @@ def safe_instantiate(agent_cls, api_key: Optional[str] = None):
         # Fallback: create instance without running __init__ and attach stub agent
         inst = agent_cls.__new__(agent_cls)
         inst.agent = StubAgent()
-        # WriterAgent expects a jinja environment on .env attribute; try to set it
-        if hasattr(inst, "env"):
-            from jinja2 import Environment, FileSystemLoader #Importing Jinja2 for templating
-            template_path = os.path.join(os.path.dirname(__file__), "ResearchWriter", "src", "research_writer", "agents", "templates") #Setting the template path
-            inst.env = Environment(loader=FileSystemLoader(template_path)) #Setting the environment
+        # The agents call their LLM directly with a system message and bounded concurrency
+        inst.llm = inst._json_llm = inst.agent
+        inst._system_msg = None
+        from research_writer.llm import ConcurrencyLimit #Importing the limiter the agents wrap LLM calls in
+        inst._limit = ConcurrencyLimit(1)
+        inst._cacheable = False #Stub output must never be written to or served from the disk cache
+        # WriterAgent renders its template sections and output without the LLM
+        if hasattr(inst, "_setup_rendering"):
+            inst._setup_rendering() #Loading the bundled templates and the Markdown parser
         return inst
 
 
@@ -137,7 +145,7 @@ def run_three_agents(task_id: str, repo_path: str, output_path: str, api_key: Op
         writer_agent = safe_instantiate(WriterAgent, api_key=api_key) #Instantiate Writer Agent
         deployment_agent = safe_instantiate(DeploymentAgent, api_key=api_key) #Instantiate Deployment Agent
 
-        analysis = research_agent.analyze_repository(repo_path) #Analyze the repository
+        analysis = research_agent.analyze_repository(repo_path, ignore_paths=[output_path]) #Analyze the repository; the output file does not invalidate the cache
         _update_task(task_id, research=analysis) #Update task with research analysis
 
         # Writer will render docs; include deployment later